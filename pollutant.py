@@ -32,6 +32,31 @@ import streamlit as st
 import numpy as np
 import plotly.graph_objects as go
 import time
+import threading
+
+# Optional: Numba compiles the Gaussian Puff into a single fused, multi-core kernel.
+# The app falls back to the pure NumPy implementation when it is not installed.
+try:
+    import numba
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+    # The kernel is launched from Streamlit's script threads. Numba would pick TBB first,
+    # whose worker pool then keeps the process from exiting; OpenMP is thread-safe and
+    # shuts down cleanly, with 'workqueue' (serialized by _numba_lock) as the fallback.
+    # An explicit NUMBA_THREADING_LAYER still takes precedence.
+    numba.config.THREADING_LAYER_PRIORITY = ["omp", "workqueue", "tbb"]
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Optional: PyVista + stpyvista render dense grids through VTK. The uniform grid is sent as
+# ImageData (dimensions, spacing, origin + the scalar field) instead of Plotly's per-voxel
+# coordinate arrays. Without them every grid is drawn with Plotly.
+try:
+    import pyvista as pv
+    from stpyvista import stpyvista
+    PYVISTA_AVAILABLE = True
+except ImportError:
+    PYVISTA_AVAILABLE = False
 
 # --- 1. Configuration & Layout Setup ---
 st.set_page_config(page_title="River Pollutant Dispersion Model", layout="wide")
@@ -78,58 +103,471 @@ z0 = st.sidebar.slider("z₀ (Depth)", 0.0, H, H/2)
 
 # --- 3. Calculation Core (Physics Engine) ---
 
-def calculate_concentration_instantaneous(t, x, y, z, M, u, v, w, Dx, Dy, Dz, x0, y0, z0):
+# Lowest iso-level drawn by the volume plots, as a fraction of the peak concentration.
+# Voxels that provably stay below it are not evaluated at all (see _visible_ranges).
+ISO_FRACTION = 0.05
+
+def _gaussian_factor(s, centre, k):
     """
-    Analytical solution for Instantaneous Point Source in 3D.
-    Uses vector-safe operations to handle both scalar and array 't' inputs.
+    exp(k * (s - centre)²) for one axis, built in a single float32 buffer with out= ufuncs
+    instead of allocating a temporary for the difference, the square and the product.
     """
-    # Safe handling for t to avoid division by zero
-    t_safe = np.maximum(t, 1e-6)
+    g = np.asarray(np.subtract(s, centre, dtype=np.float32))
+    np.square(g, out=g)
+    np.multiply(g, k, out=g)
+    return np.exp(g, out=g)
+
+
+def _puff_factors(t, x, y, z, M, u, v, w, Dx, Dy, Dz, x0, y0, z0):
+    """
+    Separable form of the Gaussian Puff: exp(a + b + c) = exp(a) exp(b) exp(c), so
+    C = term1 * gx * gy * gz. Each factor only has the broadcast shape of 't' and one
+    coordinate, e.g. (n,n,1) at most for the plot grids, so the exponentials cost O(N²)
+    instead of O(N³). Returns (term1, gx, gy, gz), with term1 = 0 wherever t <= 0.
+    """
+    # Safe handling for t to avoid division by zero.
+    # The field is evaluated in float32: it only feeds the visualization, and halving the
+    # element size halves the memory traffic of every temporary below.
+    if np.ndim(t) == 0:
+        # Snapshot (Mode 4): every time-dependent factor below is a plain Python float
+        t_safe = max(float(t), 1e-6)
+    else:
+        # Space-Time modes: factors stay on the (small) time axis, e.g. shape (n,1,1)
+        t_safe = np.maximum(t, 1e-6, dtype=np.float32)
     
     # Note: Dx, Dy, Dz are guaranteed > 0 by the sidebar check, so we don't need silent max() here.
+    # Kept as a Python float so it does not promote the float32 arrays back to float64.
+    sqrt_D = float(np.sqrt(Dx * Dy * Dz))
     
-    term1 = M / ((4 * np.pi * t_safe)**1.5 * np.sqrt(Dx * Dy * Dz))
-    exp_x = -((x - x0 - u*t_safe)**2) / (4 * Dx * t_safe)
-    exp_y = -((y - y0 - v*t_safe)**2) / (4 * Dy * t_safe)
-    exp_z = -((z - z0 - w*t_safe)**2) / (4 * Dz * t_safe)
+    # Hoisted per-time factors: centre of the advected puff and -1/(4 D t), so the
+    # exponents only subtract, square and multiply (no per-element division).
+    # The constant parts are folded into Python floats, leaving one reciprocal and one
+    # power over the time axis.
+    inv_t = 1.0 / t_safe
+    term1 = (M / ((4 * np.pi)**1.5 * sqrt_D)) * inv_t**1.5
+    xc, yc, zc = x0 + u*t_safe, y0 + v*t_safe, z0 + w*t_safe
+    kx, ky, kz = (-0.25 / Dx) * inv_t, (-0.25 / Dy) * inv_t, (-0.25 / Dz) * inv_t
     
-    C = term1 * np.exp(exp_x + exp_y + exp_z)
+    gx = _gaussian_factor(x, xc, kx)
+    gy = _gaussian_factor(y, yc, ky)
+    gz = _gaussian_factor(z, zc, kz)
 
-    # Physically, if t <= 0, concentration is 0. 
-    C = np.where(t > 0, C, 0.0)
+    # Physically, if t <= 0, concentration is 0. Masked on the time axis only.
+    if np.ndim(t) == 0:
+        term1 = term1 if t > 0 else 0.0
+    else:
+        np.multiply(term1, t > 0, out=term1)
     
-    return C
+    return term1, gx, gy, gz
 
 
-# --- 4. Main App Layout (Tabs) ---
+# A puff whose centre lies further than this many standard deviations (sqrt(2 D t)) outside
+# the evaluated extent contributes less than exp(-18) of its own peak anywhere in it.
+PUFF_CUTOFF_SIGMAS = 6.0
 
-tab1, tab2 = st.tabs(["📊 Simulation & Visualization", "📚 Theory & References"])
+def _field_is_zero(t, x, y, z, u, v, w, Dx, Dy, Dz, x0, y0, z0):
+    """
+    True when the field is zero without evaluating it: for a scalar 't', either nothing has
+    been released yet (t <= 0) or the puff has clearly left the evaluated extent along
+    some axis (see PUFF_CUTOFF_SIGMAS). Array 't' is handled per slice by the caller.
+    """
+    if np.ndim(t) != 0:
+        return False
+    if t <= 0:
+        return True
+    for s, s0, vel, D in ((x, x0, u, Dx), (y, y0, v, Dy), (z, z0, w, Dz)):
+        centre = s0 + vel * t
+        gap = max(float(np.min(s)) - centre, centre - float(np.max(s)), 0.0)
+        if gap > PUFF_CUTOFF_SIGMAS * np.sqrt(2 * D * t):
+            return True
+    return False
 
-# ==========================================
-# TAB 1: VISUALIZATION
-# ==========================================
-with tab1:
-    st.subheader("Visualization Settings")
+
+def calculate_concentration_instantaneous(t, x, y, z, M, u, v, w, Dx, Dy, Dz, x0, y0, z0):
+    """
+    Analytical solution for Instantaneous Point Source in 3D.
+    Uses vector-safe operations to handle both scalar and array 't' inputs.
+    Inputs may be scalars or broadcast-compatible axis arrays (e.g. shapes (n,1,1),
+    (1,n,1), (1,1,n)); only the returned field takes the full broadcast shape.
+    Array inputs are expected as float32; the result is float32.
+    """
+    # Physically, if t <= 0, concentration is 0; likewise once the puff has left the domain.
+    if _field_is_zero(t, x, y, z, u, v, w, Dx, Dy, Dz, x0, y0, z0):
+        return np.zeros(np.broadcast_shapes(np.shape(x), np.shape(y), np.shape(z)), dtype=np.float32)
+
+    term1, gx, gy, gz = _puff_factors(t, x, y, z, M, u, v, w, Dx, Dy, Dz, x0, y0, z0)
+
+    # Multiply the smallest factors first so only the last product is full-size, and write
+    # that one straight into a single preallocated buffer
+    f0, f1, f2 = sorted((gx, gy, gz), key=np.size)
+    head = term1 * f0 * f1
+    C = np.empty(np.broadcast_shapes(np.shape(head), np.shape(f2)), dtype=np.float32)
+    np.multiply(head, f2, out=C)
     
-    col1, col2 = st.columns([2, 1])
-    with col1:
-        plot_mode = st.selectbox(
-            "Select Plot Configuration",
-            [
-                "1. Space-Time: Time (X) vs Length (Y) vs Depth (Z)",
-                "2. Space-Time: Time (X) vs Length (Y) vs Breadth (Z)",
-                "3. Space-Time: Time (X) vs Depth (Y) vs Breadth (Z)",
-                "4. 3D Spatial Snapshot: Length (X) vs Breadth (Y) vs Depth (Z) at fixed Time"
-            ]
-        )
-    with col2:
-        # Resolution control
-        res = st.select_slider("Resolution (Grid Density)", options=["Low", "Medium", "High"], value="Medium")
-        if res == "Low": n_pts = 20
-        elif res == "Medium": n_pts = 35
-        else: n_pts = 50
+    return C
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _puff_kernel(out, P, A, B, lo1, hi1, lo2, hi2):
+        """
+        Writes out[i, j, k] = P[i] * A[i, j] * B[i, k] (see _slice_factors) in one parallel
+        pass. Only the box [lo1:hi1, lo2:hi2] of each slice out[i] is written; the caller
+        pre-fills 'out' with zeros.
+        """
+        n0 = out.shape[0]
+        for i in prange(n0):
+            p = P[i]
+            for j in range(lo1[i], hi1[i]):
+                pa = p * A[i, j]
+                for k in range(lo2[i], hi2[i]):
+                    out[i, j, k] = pa * B[i, k]
+
+
+def _slice_factors(shape, factors):
+    """
+    Collapses the separable factors of a 3D field into C[i, j, k] = P[i] * A[i, j] * B[i, k],
+    grouping each factor by the in-slice axis (1 or 2) it varies along.
+    Returns float32 arrays P (n0,), A (n0, n1), B (n0, n2), or None when a factor varies
+    along both in-slice axes and the slices do not factor this way.
+    """
+    n0, n1, n2 = shape
+    P = np.ones((n0, 1, 1), dtype=np.float32)
+    A = np.ones((n0, n1, 1), dtype=np.float32)
+    B = np.ones((n0, 1, n2), dtype=np.float32)
+    for f in factors:
+        f = np.reshape(f, (1,) * (3 - np.ndim(f)) + np.shape(f))
+        if f.shape[1] > 1 and f.shape[2] > 1:
+            return None
+        if f.shape[1] > 1:
+            A *= f
+        elif f.shape[2] > 1:
+            B *= f
+        else:
+            P *= f
+    return P[:, 0, 0], A[:, :, 0], B[:, 0, :]
+
+
+def _span(mask):
+    """First and one-past-last True index of each row of a 2D mask (0, 0 for empty rows)."""
+    hit = mask.any(axis=1)
+    lo = np.where(hit, mask.argmax(axis=1), 0)
+    hi = np.where(hit, mask.shape[1] - mask[:, ::-1].argmax(axis=1), 0)
+    return lo, hi
+
+
+def _visible_ranges(P, A, B):
+    """
+    Bounding box of the visible cloud in every slice of C[i, j, k] = P[i] * A[i, j] * B[i, k].
+
+    The factorization gives the exact maximum of every row/column of a slice, so any index
+    whose best case stays below ISO_FRACTION of the overall peak can be skipped without
+    changing what the volume plot draws, once the boxes are padded by a voxel (see
+    _pad_spans). Along each axis the kept indices are contiguous (the Gaussian factors
+    are unimodal).
+    Returns int arrays (lo1, hi1, lo2, hi2) of length n0.
+    """
+    P = np.abs(P)[:, None]  # M may be entered negative; only magnitudes matter here
+    A_max = A.max(axis=1, keepdims=True)
+    B_max = B.max(axis=1, keepdims=True)
+    threshold = ISO_FRACTION * (P * A_max * B_max).max()
+
+    lo1, hi1 = _pad_spans(*_span(P * A * B_max >= threshold), A.shape[1])
+    lo2, hi2 = _pad_spans(*_span(P * A_max * B >= threshold), B.shape[1])
+    return lo1, hi1, lo2, hi2
+
+
+def _pad_spans(lo, hi, n):
+    """
+    Widens per-slice spans [lo, hi) by one index on each side, and to the spans of the
+    neighbouring slices, clipped to [0, n). Plotly interpolates the isomin surface between
+    a visible voxel and its neighbours, so those must keep their true values, not zero.
+    """
+    empty = lo >= hi
+    lo = np.where(empty, n, lo - 1)
+    hi = np.where(empty, 0, hi + 1)
+    lo = np.minimum(lo, np.minimum(np.r_[n, lo[:-1]], np.r_[lo[1:], n]))
+    hi = np.maximum(hi, np.maximum(np.r_[0, hi[:-1]], np.r_[hi[1:], 0]))
+    lo, hi = np.clip(lo, 0, n), np.clip(hi, 0, n)
+    empty = lo >= hi
+    return np.where(empty, 0, lo), np.where(empty, 0, hi)
+
+
+def evaluate_concentration_field(t, x, y, z, M, u, v, w, Dx, Dy, Dz, x0, y0, z0):
+    """
+    Evaluates the Gaussian Puff on broadcast-compatible inputs (see
+    calculate_concentration_instantaneous), using the Numba kernel when available.
+    Only the visible bounding box of each slice is filled in; voxels outside it are set to
+    zero (they are below the plotted isomin). Returns a float32 array of the broadcast shape.
+    """
+    args = (M, u, v, w, Dx, Dy, Dz, x0, y0, z0)
+    shape = np.broadcast_shapes(np.shape(t), np.shape(x), np.shape(y), np.shape(z))
+    if _field_is_zero(t, x, y, z, u, v, w, Dx, Dy, Dz, x0, y0, z0):
+        return np.zeros(shape, dtype=np.float32)
+    split = _slice_factors(shape, _puff_factors(t, x, y, z, *args)) if len(shape) == 3 else None
+    if split is None:
+        return calculate_concentration_instantaneous(t, x, y, z, *args)
+
+    P, A, B = split
+    lo1, hi1, lo2, hi2 = _visible_ranges(P, A, B)
+    C = np.zeros(shape, dtype=np.float32)
+
+    if NUMBA_AVAILABLE:
+        with _numba_lock():
+            _puff_kernel(C, P, A, B, lo1, hi1, lo2, hi2)
+        return C
+
+    # The sub-boxes are small, so a short Python loop over the slices is cheap
+    for i in range(shape[0]):
+        j0, j1, k0, k1 = lo1[i], hi1[i], lo2[i], hi2[i]
+        if j0 < j1 and k0 < k1:
+            np.multiply(P[i] * A[i, j0:j1, None], B[i, None, k0:k1], out=C[i, j0:j1, k0:k1])
+    return C
+
+
+@st.cache_resource
+def _numba_lock():
+    """
+    Process-wide lock around the parallel kernel. Streamlit serves each session from its
+    own thread, and Numba's 'workqueue' threading layer (the fallback when OpenMP is not
+    available) aborts on concurrent launches.
+    """
+    return threading.Lock()
+
+
+# --- 4. Cached Field Evaluation ---
+# Streamlit reruns the whole script on every widget change. All physics inputs are plain
+# scalars, so results are memoized on them: reruns that leave the physics untouched skip
+# the N³ evaluation entirely.
+
+# Space-Time configurations: (fixed spatial axis, spatial axis on plot Y, spatial axis on plot Z).
+# Time is always on plot X.
+SPACETIME_LAYOUTS = {
+    "1. Space-Time": ('y', 'x', 'z'),
+    "2. Space-Time": ('z', 'x', 'y'),
+    "3. Space-Time": ('x', 'z', 'y'),
+}
+AXIS_LABELS = {'x': 'River Length [m]', 'y': 'River Breadth [m]', 'z': 'River Depth [m]'}
+
+
+def spacetime_layout(plot_mode):
+    """(fixed, plot_y, plot_z) spatial axes of a Space-Time configuration."""
+    return next(layout for key, layout in SPACETIME_LAYOUTS.items() if key in plot_mode)
+
+
+def spacetime_labels(plot_mode):
+    """Plot axis titles of a Space-Time configuration, keyed by plot axis."""
+    _, ay, az = spacetime_layout(plot_mode)
+    return {'x': 'Time [s]', 'y': AXIS_LABELS[ay], 'z': AXIS_LABELS[az]}
+
+
+def make_spacetime_axes(plot_mode, t_vals, x_vals, y_vals, z_vals, slice_loc):
+    """
+    Broadcasting inputs for a Space-Time configuration: time on axis 0, the two plotted
+    spatial axes on axes 1 and 2, and the fixed coordinate as a plain scalar.
+    Returns (t_b, x_b, y_b, z_b); nothing N³ is materialized.
+    """
+    fixed, ay, az = spacetime_layout(plot_mode)
+    vals = {'x': x_vals, 'y': y_vals, 'z': z_vals}
+    b = {fixed: slice_loc, ay: vals[ay].reshape(1, -1, 1), az: vals[az].reshape(1, 1, -1)}
+    return t_vals.reshape(-1, 1, 1), b['x'], b['y'], b['z']
+
+
+def plot_ranges(plot_mode, L, W, H, t_max):
+    """
+    (start, stop) of the three plot axes of the selected configuration, in plot (X, Y, Z)
+    order. 't_max' is None for the 3D snapshot.
+    """
+    extents = {'x': (0, L), 'y': (0, W), 'z': (0, H)}
+    if "4. 3D Spatial Snapshot" in plot_mode:
+        return (extents['x'], extents['y'], extents['z'])
+    _, ay, az = spacetime_layout(plot_mode)
+    return ((1, t_max), extents[ay], extents[az])
+
+
+def plot_axes(ranges, n_pts):
+    """The three 1D float32 plot axes for the given plot_ranges()."""
+    return tuple(np.linspace(lo, hi, n_pts, dtype=np.float32) for lo, hi in ranges)
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def grid_coordinates(ranges, n_pts):
+    """
+    Flattened float32 plot coordinates (x, y, z) for the given plot_ranges().
+    Geometry only changes with the plotted extents and resolution, not with time, flow,
+    dispersion or source terms, so it is built once and shared. cache_resource hands back
+    the same read-only arrays on every rerun instead of unpickling fresh N³ copies.
+    """
+    axes = plot_axes(ranges, n_pts)
+
+    # Expand the sparse axes to per-point coordinates only once per geometry
+    grids = np.broadcast_arrays(*np.meshgrid(*axes, indexing='ij', sparse=True))
+    # Broadcast views are strided, so materialize each once; ravel() is then a free view
+    coords = tuple(np.ascontiguousarray(g).ravel() for g in grids)
+    for c in coords:
+        c.setflags(write=False)
+    return coords
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def compute_field(plot_mode, n_pts, L, W, H, u, v, w, Dx, Dy, Dz, M, x0, y0, z0, t_param, slice_loc):
+    """
+    Evaluates the concentration field for the selected plot configuration.
+    't_param' is the snapshot time (Mode 4) or the max simulation time (Space-Time modes);
+    'slice_loc' is the fixed coordinate of the Space-Time slice (unused in Mode 4).
+    Returns the flattened float32 field (C-ordered over the plot axes) and the peak
+    concentration; the matching coordinates come from grid_coordinates().
+    """
+    x_vals = np.linspace(0, L, n_pts, dtype=np.float32)
+    y_vals = np.linspace(0, W, n_pts, dtype=np.float32)
+    z_vals = np.linspace(0, H, n_pts, dtype=np.float32)
+
+    if "4. 3D Spatial Snapshot" in plot_mode:
+        # x -> axis 0, y -> axis 1, z -> axis 2 at a fixed time
+        t_axis = t_param
+        x_axis = x_vals.reshape(-1, 1, 1)
+        y_axis = y_vals.reshape(1, -1, 1)
+        z_axis = z_vals.reshape(1, 1, -1)
+    else:
+        # Time -> axis 0. The fixed slice coordinate is passed as a plain scalar, so its
+        # Gaussian factor is a vector over time only (shape (n,1,1)) and is folded into the
+        # per-time prefactor; no full-size array is ever filled with the constant.
+        t_vals = np.linspace(1, t_param, n_pts, dtype=np.float32)
+        t_axis, x_axis, y_axis, z_axis = make_spacetime_axes(
+            plot_mode, t_vals, x_vals, y_vals, z_vals, slice_loc)
+
+    # Always calculate Instantaneous
+    C = evaluate_concentration_field(t_axis, x_axis, y_axis, z_axis, M, u, v, w, Dx, Dy, Dz, x0, y0, z0)
+    return C.ravel().astype(np.float32, copy=False), float(np.max(C))
+
+
+# --- 5. Plot Rendering (Adaptive Resolution) ---
+# The plot block runs as a fragment, so its own widgets (time, slice) rerun only the plot.
+# On the dense High grid, a parameter change is first drawn on a coarse grid; the full
+# grid (and its much larger browser payload) follows once the inputs have been idle for
+# PREVIEW_DELAY seconds. Lower tiers are cheap enough to draw in full straight away.
+
+PREVIEW_DELAY = 0.4     # Idle time [s] before a preview is refined
+PREVIEW_MIN_PTS = 12    # Coarsest preview grid
+PREVIEW_FROM_PTS = 50   # Only grids this dense are previewed first
+VTK_MIN_PTS = 50        # Grids this dense are rendered with PyVista when it is installed
+
+
+def _render_resolution(field_key, n_pts):
+    """
+    Grid density for this render: (n_pts_effective, is_preview).
+    Grids below PREVIEW_FROM_PTS, and parameter sets already drawn at full resolution (and
+    so held by compute_field's cache), are rendered at full resolution straight away.
+    """
+    if n_pts < PREVIEW_FROM_PTS or field_key in st.session_state.get('full_res_keys', []):
+        return n_pts, False
+    return max(PREVIEW_MIN_PTS, n_pts // 2), True
+
+
+def _refine_after_idle(field_key):
+    """Waits for the inputs to settle, then reruns the plot at full resolution."""
+    st.caption("Preview at reduced resolution, refining...")
+    # Any widget change during the wait supersedes this rerun with the user's own
+    time.sleep(PREVIEW_DELAY)
+    recent = [k for k in st.session_state.get('full_res_keys', []) if k != field_key]
+    st.session_state['full_res_keys'] = recent[-7:] + [field_key]
+    try:
+        st.rerun(scope="fragment")
+    except st.errors.StreamlitAPIException:
+        # Fragment-scoped reruns are only allowed during fragment runs, not full app runs
+        st.rerun()
+
+
+def _show_volume_vtk(C_flat, axes, titles, c_max, cmap, true_aspect):
+    """
+    Volume rendering through PyVista/VTK for dense grids. The grid is uniform, so it is
+    built as ImageData from its dimensions, spacing and origin; only the scalar field is
+    shipped. 'true_aspect' keeps physical proportions (3D snapshot); otherwise every axis
+    spans the same length, like Plotly's default scaling for the Space-Time plots.
+    """
+    dims = tuple(len(a) for a in axes)
+    bounds = [(float(a[0]), float(a[-1])) for a in axes]
+    if true_aspect:
+        origin = tuple(lo for lo, _ in bounds)
+        spacing = tuple((hi - lo) / (n - 1) for (lo, hi), n in zip(bounds, dims))
+    else:
+        origin = (0.0, 0.0, 0.0)
+        spacing = tuple(1.0 / (n - 1) for n in dims)
+
+    grid = pv.ImageData(dimensions=dims, spacing=spacing, origin=origin)
+    # VTK orders points x-fastest (Fortran order); C_flat is the C-ordered field
+    grid.point_data["C"] = C_flat.reshape(dims).ravel(order="F")
 
-    # --- Plot Generation Block ---
+    plotter = pv.Plotter(off_screen=True, window_size=[800, 600])
+    plotter.add_volume(grid, scalars="C", opacity="sigmoid", cmap=cmap,
+                       clim=(c_max * ISO_FRACTION, c_max), scalar_bar_args={"title": "C [kg/m³]"})
+    plotter.show_bounds(xtitle=titles[0], ytitle=titles[1], ztitle=titles[2],
+                        axes_ranges=[v for b in bounds for v in b])
+    plotter.view_isometric()
+    stpyvista(plotter)
+
+
+def _display_controls(opacity, surface_count):
+    """
+    Plotly display sliders, initialised to the configuration's defaults. They only feed
+    _build_volume, so dragging them reuses the cached field and rebuilds just the figure.
+    """
+    c1, c2 = st.columns(2)
+    with c1:
+        opacity = st.slider("Opacity", 0.05, 1.0, opacity, step=0.05)
+    with c2:
+        surface_count = st.slider("Iso-surfaces", 5, 40, surface_count)
+    return opacity, surface_count
+
+
+def _quantize(C_flat, c_max):
+    """
+    Field rescaled to uint8 levels, 0..255 for 0..c_max. The iso-surfaces are drawn with
+    far fewer than 256 levels, so this loses nothing visible and ships a quarter of the
+    float32 payload to the browser. Levels are rounded down, so any level at or above
+    isomin (255 * ISO_FRACTION) is at least ISO_FRACTION of the peak, as the pruning in
+    _visible_ranges assumes.
+    """
+    scale = 255.0 / c_max if c_max > 0 else 0.0
+    q = np.multiply(C_flat, scale, dtype=np.float32)
+    np.clip(q, 0, 255, out=q)
+    np.floor(q, out=q)
+    return q.astype(np.uint8)
+
+
+def _build_volume(coords, C_flat, c_max, titles, opacity, surface_count, colorscale):
+    """
+    Plotly volume figure for a cached field; cheap, as no physics is evaluated here.
+    Values are sent as uint8 levels (see _quantize); the colorbar is labelled in kg/m³,
+    and the hover readout gives the position and the level against the peak.
+    """
+    x_flat, y_flat, z_flat = coords
+    ticks = np.linspace(0, 255, 6)
+    return go.Figure(data=go.Volume(
+        x=x_flat,
+        y=y_flat,
+        z=z_flat,
+        value=_quantize(C_flat, c_max),
+        isomin=255 * ISO_FRACTION,
+        isomax=255,
+        colorbar=dict(title="C [kg/m³]", tickvals=ticks,
+                      ticktext=[f"{c_max * tv / 255:.2e}" for tv in ticks]),
+        opacity=opacity,
+        surface_count=surface_count,
+        colorscale=colorscale,
+        caps=dict(x_show=False, y_show=False, z_show=False),
+        # Plotly cannot rescale in a hover template, so the level is shown against the peak
+        hovertemplate=(f"{titles[0]}: %{{x:.4g}}<br>{titles[1]}: %{{y:.4g}}<br>"
+                       f"{titles[2]}: %{{z:.4g}}<br>"
+                       f"C: %{{value:.0f}}/255 × {c_max:.3e} kg/m³<extra></extra>")
+    ))
+
+
+@st.fragment
+def render_plot_block(plot_mode, n_pts):
+    """Widgets, field evaluation and volume plot for the selected configuration."""
+    # Dense grids are drawn through PyVista/VTK when it is available
+    use_vtk = PYVISTA_AVAILABLE and n_pts >= VTK_MIN_PTS
 
     if "4. 3D Spatial Snapshot" in plot_mode:
         # === Mode 4: Real 3D Space (X, Y, Z) at fixed T ===
@@ -137,44 +575,36 @@ with tab1:
         
         sim_time = st.slider("Time T [s]", 0.0, 3600.0, 60.0, step=10.0)
         
-        # Create spatial grid
-        x_vals = np.linspace(0, L, n_pts)
-        y_vals = np.linspace(0, W, n_pts)
-        z_vals = np.linspace(0, H, n_pts)
-        X, Y, Z = np.meshgrid(x_vals, y_vals, z_vals, indexing='ij')
+        field_args = (L, W, H, u, v, w_vel, Dx, Dy, Dz, M, x0, y0, z0, sim_time, None)
+        n_eff, preview = _render_resolution((plot_mode, n_pts) + field_args, n_pts)
         
         with st.spinner('Calculating 3D Field...'):
-            # Always calculate Instantaneous
-            C = calculate_concentration_instantaneous(sim_time, X, Y, Z, M, u, v, w_vel, Dx, Dy, Dz, x0, y0, z0)
+            C_flat, c_max = compute_field(plot_mode, n_eff, *field_args)
 
         # Visualization Setup
-        c_max = np.max(C)
-        
-        fig = go.Figure(data=go.Volume(
-            x=X.flatten(),
-            y=Y.flatten(),
-            z=Z.flatten(),
-            value=C.flatten(),
-            isomin=c_max * 0.05, 
-            isomax=c_max,
-            opacity=0.3, 
-            surface_count=15, 
-            colorscale='Jet',
-            caps=dict(x_show=False, y_show=False, z_show=False)
-        ))
-
-        fig.update_layout(
-            scene=dict(
-                xaxis_title='Length (X) [m]',
-                yaxis_title='Breadth (Y) [m]',
-                zaxis_title='Depth (Z) [m]',
-                aspectmode='data'
-            ),
-            title=f"Concentration Field at T = {sim_time}s (Instantaneous Pulse)",
-            margin=dict(l=0, r=0, b=0, t=40)
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        ranges = plot_ranges(plot_mode, L, W, H, None)
+        titles = ('Length (X) [m]', 'Breadth (Y) [m]', 'Depth (Z) [m]')
+        if use_vtk:
+            st.markdown(f"**Concentration Field at T = {sim_time}s (Instantaneous Pulse)**")
+            _show_volume_vtk(C_flat, plot_axes(ranges, n_eff), titles,
+                             c_max, 'jet', true_aspect=True)
+        else:
+            opacity, surface_count = _display_controls(0.3, 15)
+            fig = _build_volume(grid_coordinates(ranges, n_eff), C_flat, c_max, titles,
+                                opacity, surface_count, 'Jet')
+
+            fig.update_layout(
+                scene=dict(
+                    xaxis_title=titles[0],
+                    yaxis_title=titles[1],
+                    zaxis_title=titles[2],
+                    aspectmode='data'
+                ),
+                title=f"Concentration Field at T = {sim_time}s (Instantaneous Pulse)",
+                margin=dict(l=0, r=0, b=0, t=40)
+            )
+            
+            st.plotly_chart(fig, use_container_width=True)
         st.write(f"**Max Concentration:** {c_max:.4e} kg/m³")
 
     else:
@@ -183,87 +613,89 @@ with tab1:
         
         # 1. Setup Time Axis
         t_max = st.slider("Max Time for Simulation [s]", 60.0, 7200.0, 600.0)
-        t_vals = np.linspace(1, t_max, n_pts) 
         
         # 2. Determine Axis mapping based on selection
         if "1. Space-Time" in plot_mode:
             # X: Time, Y: Length, Z: Depth (Breadth fixed)
             slice_loc = st.slider(f"Fixed Breadth (y) slice [m]", 0.0, W, y0)
-            
-            y_grid = slice_loc
-            x_vals = np.linspace(0, L, n_pts)
-            z_vals = np.linspace(0, H, n_pts)
-            
-            T_grid, X_grid, Z_grid = np.meshgrid(t_vals, x_vals, z_vals, indexing='ij')
-            Y_grid = np.full_like(T_grid, y_grid)
-            
-            labels = {'x': 'Time [s]', 'y': 'River Length [m]', 'z': 'River Depth [m]'}
-            plot_x, plot_y, plot_z = T_grid, X_grid, Z_grid
-
         elif "2. Space-Time" in plot_mode:
             # X: Time, Y: Length, Z: Breadth (Depth fixed)
             slice_loc = st.slider(f"Fixed Depth (z) slice [m]", 0.0, H, z0)
-            
-            z_grid = slice_loc
-            x_vals = np.linspace(0, L, n_pts)
-            y_vals = np.linspace(0, W, n_pts)
-            
-            T_grid, X_grid, Y_grid = np.meshgrid(t_vals, x_vals, y_vals, indexing='ij')
-            Z_grid = np.full_like(T_grid, z_grid)
-            
-            labels = {'x': 'Time [s]', 'y': 'River Length [m]', 'z': 'River Breadth [m]'}
-            plot_x, plot_y, plot_z = T_grid, X_grid, Y_grid
-
         elif "3. Space-Time" in plot_mode:
             # X: Time, Y: Depth, Z: Breadth (Length fixed)
             slice_loc = st.slider(f"Fixed Length (x) slice [m]", 0.0, L, L/2)
-            
-            x_grid = slice_loc
-            z_vals = np.linspace(0, H, n_pts)
-            y_vals = np.linspace(0, W, n_pts)
-            
-            T_grid, Z_grid, Y_grid = np.meshgrid(t_vals, z_vals, y_vals, indexing='ij')
-            X_grid = np.full_like(T_grid, x_grid)
-            
-            labels = {'x': 'Time [s]', 'y': 'River Depth [m]', 'z': 'River Breadth [m]'}
-            plot_x, plot_y, plot_z = T_grid, Z_grid, Y_grid
+
+        labels = spacetime_labels(plot_mode)
 
         # 3. Calculate Concentration
+        field_args = (L, W, H, u, v, w_vel, Dx, Dy, Dz, M, x0, y0, z0, t_max, slice_loc)
+        n_eff, preview = _render_resolution((plot_mode, n_pts) + field_args, n_pts)
+        
         with st.spinner('Calculating Space-Time Field...'):
-            # Always calculate Instantaneous
-            C = calculate_concentration_instantaneous(T_grid, X_grid, Y_grid, Z_grid, M, u, v, w_vel, Dx, Dy, Dz, x0, y0, z0)
+            C_flat, c_max = compute_field(plot_mode, n_eff, *field_args)
 
         # 4. Plot
-        c_max = np.max(C)
-        
+        ranges = plot_ranges(plot_mode, L, W, H, t_max)
         st.markdown(f"**Visualizing:** {labels['x']} vs {labels['y']} vs {labels['z']}")
         
-        fig = go.Figure(data=go.Volume(
-            x=plot_x.flatten(),
-            y=plot_y.flatten(),
-            z=plot_z.flatten(),
-            value=C.flatten(),
-            isomin=c_max * 0.05,
-            isomax=c_max,
-            opacity=0.2,
-            surface_count=20,
-            colorscale='Turbo',
-            caps=dict(x_show=False, y_show=False, z_show=False)
-        ))
-
-        fig.update_layout(
-            scene=dict(
-                xaxis_title=labels['x'],
-                yaxis_title=labels['y'],
-                zaxis_title=labels['z'],
-            ),
-            title="Space-Time Dispersion (Instantaneous Pulse)",
-            margin=dict(l=0, r=0, b=0, t=40)
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        if use_vtk:
+            st.markdown("**Space-Time Dispersion (Instantaneous Pulse)**")
+            _show_volume_vtk(C_flat, plot_axes(ranges, n_eff),
+                             (labels['x'], labels['y'], labels['z']),
+                             c_max, 'turbo', true_aspect=False)
+        else:
+            opacity, surface_count = _display_controls(0.2, 20)
+            fig = _build_volume(grid_coordinates(ranges, n_eff), C_flat, c_max,
+                                (labels['x'], labels['y'], labels['z']),
+                                opacity, surface_count, 'Turbo')
+
+            fig.update_layout(
+                scene=dict(
+                    xaxis_title=labels['x'],
+                    yaxis_title=labels['y'],
+                    zaxis_title=labels['z'],
+                ),
+                title="Space-Time Dispersion (Instantaneous Pulse)",
+                margin=dict(l=0, r=0, b=0, t=40)
+            )
+            
+            st.plotly_chart(fig, use_container_width=True)
         st.write(f"**Peak Concentration in this domain:** {c_max:.4e} kg/m³")
 
+    if preview:
+        _refine_after_idle((plot_mode, n_pts) + field_args)
+
+
+# --- 6. Main App Layout (Tabs) ---
+
+tab1, tab2 = st.tabs(["📊 Simulation & Visualization", "📚 Theory & References"])
+
+# ==========================================
+# TAB 1: VISUALIZATION
+# ==========================================
+with tab1:
+    st.subheader("Visualization Settings")
+    
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        plot_mode = st.selectbox(
+            "Select Plot Configuration",
+            [
+                "1. Space-Time: Time (X) vs Length (Y) vs Depth (Z)",
+                "2. Space-Time: Time (X) vs Length (Y) vs Breadth (Z)",
+                "3. Space-Time: Time (X) vs Depth (Y) vs Breadth (Z)",
+                "4. 3D Spatial Snapshot: Length (X) vs Breadth (Y) vs Depth (Z) at fixed Time"
+            ]
+        )
+    with col2:
+        # Resolution control
+        res = st.select_slider("Resolution (Grid Density)", options=["Low", "Medium", "High"], value="Medium")
+        if res == "Low": n_pts = 20
+        elif res == "Medium": n_pts = 35
+        else: n_pts = 50
+
+    render_plot_block(plot_mode, n_pts)
+
 
 # ==========================================
 # TAB 2: THEORY & REFERENCES